@@ -1,6 +1,8 @@
 import sys
 import os
 import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
 # 1. 경로 설정 및 환경 변수 강제 로드
@@ -11,6 +13,18 @@ if BASE_DIR not in sys.path:
 # main 실행 시점에서 .env를 로드하여 설정 누락 여부를 조기에 파악합니다.
 load_dotenv()
 
+# 병렬 실행되는 작업들의 상태 메시지가 서로 섞이지 않도록 출력 구간을 보호합니다.
+print_lock = threading.Lock()
+
+def run_job(job):
+    """
+    단일 ETL 작업을 실행합니다. 스레드 풀의 워커에서 호출됩니다.
+    작업별로 독립된 DB 엔진/HTTP 세션을 사용하므로 공유 상태가 없습니다.
+    """
+    with print_lock:
+        print(f"▶️  [{job.table_name}] 실행 중...")
+    job.run()
+
 def setup_directories():
     """
     ETL 프로세스에 필요한 폴더 구조(data/raw)를 자동으로 생성하고 파일 존재 여부를 확인합니다.
@@ -21,7 +35,8 @@ def setup_directories():
         os.makedirs(data_raw_path, exist_ok=True)
 
     # 파일 존재 여부 점검
-    files = [f for f in os.listdir(data_raw_path) if f.endswith(('.xlsx', '.csv'))]
+    with os.scandir(data_raw_path) as it:
+        files = [entry.name for entry in it if entry.is_file() and entry.name.endswith(('.xlsx', '.csv'))]
 
     print("-" * 60)
     print(f"✅ [경로 확인] {data_raw_path}")
@@ -88,14 +103,20 @@ def main():
         print("\n🚫 실행 가능한 ETL 작업이 없습니다. 설정을 다시 확인해 주세요.")
         return
 
-    print(f"\n📊 총 {len(jobs)}개의 작업을 순차적으로 실행합니다.\n")
+    print(f"\n📊 총 {len(jobs)}개의 작업을 병렬로 실행합니다.\n")
 
-    for job in jobs:
-        try:
-            print(f"▶️  [{job.table_name}] 실행 중...")
-            job.run()
-        except Exception as e:
-            print(f"\n❌ [{job.table_name}] 중단됨: {str(e)}")
+    # 각 작업은 네트워크(API/DB) 대기 시간이 대부분이므로 동시에 실행하여
+    # 전체 소요 시간을 가장 오래 걸리는 작업 수준으로 줄입니다.
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        future_to_job = {executor.submit(run_job, job): job for job in jobs}
+
+        for future in as_completed(future_to_job):
+            job = future_to_job[future]
+            try:
+                future.result()
+            except Exception as e:
+                with print_lock:
+                    print(f"\n❌ [{job.table_name}] 중단됨: {str(e)}")
 
     print("\n" + "="*60)
     print("🏁 모든 ETL 프로세스 종료")
@@ -2,7 +2,9 @@ import os
 import pandas as pd
 import requests
 import io
-from sqlalchemy import create_engine, text
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sqlalchemy import create_engine
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
 
@@ -12,16 +14,43 @@ load_dotenv()
 class BaseETL(ABC):
     """
     모든 ETL 프로세스의 공통 기능을 정의하는 추상 베이스 클래스.
-    데이터 누적 방지를 위한 TRUNCATE 기능을 추가.
+    자연키(natural_key) 기반 UPSERT로 데이터 누적을 방지합니다.
     """
+    # 자연키 인덱스(UNIQUE ... NULLS NOT DISTINCT)에 필요한 최소 PostgreSQL 버전 (15.0)
+    min_server_version_num = 150000
+
+    # 일시적인 서버 오류로 보고 재시도할 HTTP 상태 코드
+    retry_status_codes = (429, 500, 502, 503, 504)
+
     def __init__(self, table_name):
         self.table_name = table_name
-        self.db_url = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-        self.engine = create_engine(self.db_url)
+        # COPY(copy_expert)와 executemany 옵션은 psycopg2 전용이므로 드라이버를 명시합니다.
+        self.db_url = f"postgresql+psycopg2://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+        # 커넥션 풀을 명시적으로 구성하고, executemany 실행 시 다중 VALUES 배치로 전송합니다.
+        self.engine = create_engine(
+            self.db_url,
+            pool_size=10,
+            max_overflow=20,
+            pool_pre_ping=True,
+            executemany_mode="values_plus_batch",
+            insertmanyvalues_page_size=10000,
+            executemany_batch_page_size=500
+        )
+        # COPY 전송 시 한 번에 메모리에 올릴 최대 행 수
+        self.copy_chunk_size = 50000
+
+    @property
+    @abstractmethod
+    def natural_key(self):
+        """행을 식별하는 자연키 컬럼 튜플 (UPSERT 충돌 판정 기준)"""
+        pass
 
     @abstractmethod
     def extract(self):
-        """원천 데이터 추출 (API, 파일 등)"""
+        """
+        원천 데이터 추출 (API, 파일 등).
+        load()는 원천에 없는 행을 삭제하므로, 일부만 수집된 경우에는 빈 결과를 반환해야 합니다.
+        """
         pass
 
     @abstractmethod
@@ -29,37 +58,149 @@ class BaseETL(ABC):
         """데이터 정제 및 변환"""
         pass
 
+    def create_session(self, pool_size=32):
+        """
+        커넥션 풀 크기와 재시도 정책이 설정된 requests.Session을 생성합니다.
+        기본 풀(10개)보다 큰 풀을 마운트하여 동시 요청 시에도 TCP/TLS 연결을 재사용합니다.
+        """
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=self.retry_status_codes)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
+
+    def copy_dataframe(self, cur, df, table_name):
+        """
+        DataFrame을 PostgreSQL COPY 프로토콜로 적재합니다.
+        행 단위 INSERT 대신 CSV 스트림을 그대로 전송하며,
+        메모리 사용량을 제한하기 위해 copy_chunk_size 행 단위로 나누어 보냅니다.
+        트랜잭션 관리는 호출자가 담당합니다.
+        """
+        columns = ', '.join(df.columns)
+        copy_sql = f"COPY {table_name} ({columns}) FROM STDIN WITH CSV NULL '\\N'"
+
+        for start in range(0, len(df), self.copy_chunk_size):
+            buf = io.StringIO()
+            df.iloc[start:start + self.copy_chunk_size].to_csv(buf, index=False, header=False, na_rep='\\N')
+            buf.seek(0)
+            cur.copy_expert(copy_sql, buf)
+
+    def ensure_natural_key_index(self, cur):
+        """
+        ON CONFLICT 판정에 필요한 자연키 유니크 인덱스를 1회성 마이그레이션으로 생성합니다.
+        현재 natural_key와 같은 컬럼의 인덱스가 이미 있으면 아무 작업도 하지 않으며, 없을 때만
+        TRUNCATE 적재 시절에 쌓인 자연키 중복 행을 키마다 한 건만 남기고 정리한 뒤 인덱스를 만듭니다.
+        natural_key가 변경되어 기존 인덱스의 컬럼과 다르면 인덱스를 다시 만듭니다.
+        키 컬럼의 NULL도 같은 값으로 취급하도록 NULLS NOT DISTINCT(PostgreSQL 15+)를 사용합니다.
+        """
+        index_name = f"{self.table_name}_natural_key_uidx"
+        keys = ', '.join(self.natural_key)
+        cur.execute("SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname = %s", (self.table_name, index_name))
+        existing = cur.fetchone()
+        if existing and f"({keys}) NULLS NOT DISTINCT" in existing[0]:
+            return
+
+        # NULLS NOT DISTINCT는 PostgreSQL 15부터 지원되므로, 구버전에서는 구문 오류 대신 명확한 사유로 중단합니다.
+        cur.execute("SHOW server_version_num")
+        server_version = int(cur.fetchone()[0])
+        if server_version < self.min_server_version_num:
+            raise RuntimeError(
+                f"자연키 UPSERT 적재에는 PostgreSQL 15 이상이 필요합니다. (현재 server_version_num: {server_version})"
+            )
+
+        if existing:
+            print(f"[{self.table_name}] 자연키가 변경되어 기존 인덱스를 다시 만듭니다: {existing[0]}")
+            cur.execute(f"DROP INDEX {index_name}")
+
+        cur.execute(f"""
+            DELETE FROM {self.table_name}
+            WHERE ctid IN (
+                SELECT ctid FROM (
+                    SELECT ctid, ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY ctid) AS rn
+                    FROM {self.table_name}
+                ) d
+                WHERE rn > 1
+            )
+        """)
+        print(f"[{self.table_name}] 자연키 인덱스 마이그레이션: 중복 행 {cur.rowcount}건을 정리했습니다.")
+        cur.execute(f"CREATE UNIQUE INDEX {index_name} ON {self.table_name} ({keys}) NULLS NOT DISTINCT")
+
     def load(self, df):
         """
         데이터를 DB에 적재합니다.
-        적재 전 기존 데이터를 삭제(TRUNCATE)하여 중복 누적을 방지합니다.
+        스테이징 테이블에 COPY 한 뒤 자연키(natural_key) 기준으로 UPSERT 하여,
+        값이 바뀌지 않은 행은 건드리지 않고 원천에서 사라진 행만 삭제합니다.
+        geom은 INSERT ... SELECT 시점에 함께 계산하므로 별도의 UPDATE 패스가 필요하지 않습니다.
         """
         if df is not None and not df.empty:
+            columns = ', '.join(df.columns)
+            keys = ', '.join(self.natural_key)
+            # 값이 비어 있을 수 있는 키 컬럼만 NULL 안전 비교를 사용하여 나머지 키는 해시 조인이 가능하게 둡니다.
+            key_match = ' AND '.join(
+                f"s.{k} IS NOT DISTINCT FROM t.{k}" if df[k].isna().any() else f"s.{k} = t.{k}"
+                for k in self.natural_key
+            )
+            data_columns = [c for c in df.columns if c not in self.natural_key]
+            value_columns = data_columns + ['geom']
+            update_set = ', '.join(f"{c} = EXCLUDED.{c}" for c in value_columns)
+            current_values = ', '.join(f"{self.table_name}.{c}" for c in value_columns)
+            new_values = ', '.join(f"EXCLUDED.{c}" for c in value_columns)
+            # 자연키가 같은 원천 행 중 어떤 행이 남을지 값 기준으로 고정합니다.
+            survivor_order = ', '.join([*self.natural_key, *data_columns])
+            stage_table = f"{self.table_name}_stage"
+
+            raw_conn = self.engine.raw_connection()
             try:
-                # 1. 중복 방지를 위해 기존 테이블 데이터 삭제
-                # RESTART IDENTITY는 일련번호를 1번부터 다시 시작하게 하며,
-                # CASCADE는 외래키 관계가 있을 경우 함께 처리합니다.
-                with self.engine.begin() as conn:
-                    conn.execute(text(f"TRUNCATE TABLE {self.table_name} RESTART IDENTITY CASCADE"))
-                    print(f"[{self.table_name}] 기존 데이터를 삭제하고 초기화하였습니다.")
-
-                # 2. 신규 데이터 적재
-                df.to_sql(self.table_name, self.engine, if_exists='append', index=False)
-
-                # 3. PostGIS 공간 데이터(geom) 생성
-                with self.engine.begin() as conn:
-                    update_geom = text(f"""
-                        UPDATE {self.table_name}
-                        SET geom = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
-                        WHERE geom IS NULL 
-                          AND latitude IS NOT NULL 
-                          AND longitude IS NOT NULL;
+                # 자연키가 같은 원천 행은 한 건으로 합쳐지므로 그 규모를 알립니다.
+                collapsed_count = int(df.duplicated(subset=list(self.natural_key)).sum())
+                if collapsed_count > 0:
+                    print(f"[{self.table_name}] ⚠️ 자연키({keys})가 중복된 {collapsed_count}건은 한 건으로 합쳐 적재됩니다.")
+
+                with raw_conn.cursor() as cur:
+                    # 1. 자연키 유니크 인덱스가 없으면 1회성 마이그레이션 수행
+                    self.ensure_natural_key_index(cur)
+
+                    # 2. 적재 대상 컬럼만 가진 임시 스테이징 테이블로 COPY
+                    # (기본값/제약조건을 복사하지 않아 일련번호 시퀀스를 소모하지 않습니다.)
+                    cur.execute(f"""
+                        CREATE TEMP TABLE {stage_table} ON COMMIT DROP AS
+                        SELECT {columns} FROM {self.table_name} WITH NO DATA
+                    """)
+                    self.copy_dataframe(cur, df, stage_table)
+
+                    # 3. 원천 데이터에서 사라진 행 삭제
+                    cur.execute(f"""
+                        DELETE FROM {self.table_name} t
+                        WHERE NOT EXISTS (SELECT 1 FROM {stage_table} s WHERE {key_match})
+                    """)
+                    deleted_count = cur.rowcount
+
+                    # 4. PostGIS 공간 데이터(geom)를 계산하며 UPSERT
+                    # 좌표가 없는 행도 누락 없이 적재하고 geom만 NULL로 두며,
+                    # 값이 동일한 기존 행은 갱신하지 않아 불필요한 행 버전(MVCC)과 WAL을 만들지 않습니다.
+                    cur.execute(f"""
+                        INSERT INTO {self.table_name} ({columns}, geom)
+                        SELECT DISTINCT ON ({keys}) {columns},
+                               CASE WHEN latitude IS NOT NULL AND longitude IS NOT NULL
+                                    THEN ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)
+                               END
+                        FROM {stage_table}
+                        ORDER BY {survivor_order}
+                        ON CONFLICT ({keys}) DO UPDATE
+                        SET {update_set}
+                        WHERE ({current_values}) IS DISTINCT FROM ({new_values})
                     """)
-                    conn.execute(update_geom)
+                    upserted_count = cur.rowcount
+                raw_conn.commit()
 
-                print(f"[{self.table_name}] 총 {len(df)}건의 데이터를 성공적으로 적재하고 공간 인덱스를 갱신했습니다.")
+                print(f"[{self.table_name}] 원천 {len(df)}건(중복 병합 후 {len(df) - collapsed_count}건) 중 신규/변경 {upserted_count}건, 삭제 {deleted_count}건을 반영하고 공간 인덱스를 갱신했습니다.")
             except Exception as e:
+                raw_conn.rollback()
                 print(f"[{self.table_name}] 적재 에러 발생: {e}")
+            finally:
+                raw_conn.close()
         else:
             print(f"[{self.table_name}] 처리할 데이터가 없어 적재를 건너뜁니다.")
 
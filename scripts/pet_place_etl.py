@@ -1,6 +1,7 @@
-import requests
 import pandas as pd
 import os
+import math
+from concurrent.futures import ThreadPoolExecutor
 from scripts.base_etl import BaseETL
 
 class PetPlaceETL(BaseETL):
@@ -8,15 +9,43 @@ class PetPlaceETL(BaseETL):
     한국관광공사 반려동물 동반여행 서비스 API(KorPetTourService2)를 이용한
     반려견 동반 가능 시설 수집 모듈입니다.
     """
+    natural_key = ('facility_name', 'address')
+
     def __init__(self):
         super().__init__(table_name='pet_places')
         self.api_key = os.getenv('PUBLIC_DATA_API_KEY')
         # 사용자가 지정한 KorPetTourService2 기반의 지역기반 목록 조회 엔드포인트
         self.endpoint = "https://apis.data.go.kr/B551011/KorPetTourService2/areaBasedList2"
+        self.session = self.create_session()
+        # 페이지당 조회 건수 및 2페이지 이후 병렬 조회 워커 수
+        self.page_size = 500
+        self.max_workers = 8
+
+    def fetch_page(self, params, page_no):
+        """
+        지정한 페이지를 조회하여 응답 JSON을 반환합니다.
+        HTTP 200이어도 헤더의 resultCode가 정상(0000)이 아니면 예외를 발생시킵니다.
+        """
+        response = self.session.get(self.endpoint, params={**params, 'pageNo': page_no}, timeout=20)
+        response.raise_for_status()
+        data = response.json()
+
+        header = data.get('response', {}).get('header', {})
+        if header.get('resultCode') != '0000':
+            raise ValueError(f"{page_no}페이지 API 오류 응답 ({header.get('resultCode')}): {header.get('resultMsg')}")
+        return data
+
+    def parse_items(self, data):
+        """응답 JSON에서 시설 목록을 꺼냅니다. (결과가 1건이면 dict, 없으면 빈 문자열로 내려옵니다.)"""
+        items = data.get('response', {}).get('body', {}).get('items') or {}
+        items = items.get('item', [])
+        return [items] if isinstance(items, dict) else list(items)
 
     def extract(self):
         """
         KorPetTourService2 API 규격에 맞는 파라미터를 사용하여 데이터를 추출합니다.
+        1페이지의 totalCount로 전체 페이지 수를 구한 뒤 나머지 페이지를 병렬로 조회하며,
+        수집 건수가 totalCount와 다르면 전체를 실패로 처리합니다.
         """
         if not self.api_key:
             print("[PetPlace] 오류: PUBLIC_DATA_API_KEY가 .env에 설정되지 않았습니다.")
@@ -25,7 +54,7 @@ class PetPlaceETL(BaseETL):
         params = {
             'serviceKey': self.api_key,
             'pageNo': 1,
-            'numOfRows': 500,
+            'numOfRows': self.page_size,
             'MobileOS': 'ETC',
             'MobileApp': 'DogooDogoo',
             '_type': 'json',
@@ -34,14 +63,25 @@ class PetPlaceETL(BaseETL):
 
         try:
             print(f"[PetPlace] API 접속 시도: {self.endpoint}")
-            response = requests.get(self.endpoint, params=params, timeout=20)
-            response.raise_for_status()
-
-            data = response.json()
-            items = data.get('response', {}).get('body', {}).get('items', {}).get('item', [])
+            data = self.fetch_page(params, 1)
+            items = self.parse_items(data)
 
             if not items:
                 print(f"[PetPlace] 경고: API 응답에 데이터가 없습니다. (결과 메시지: {data.get('response', {}).get('header', {}).get('resultMsg')})")
+                return items
+
+            total_count = int(data.get('response', {}).get('body', {}).get('totalCount') or 0)
+            total_pages = math.ceil(total_count / self.page_size)
+
+            if total_pages > 1:
+                print(f"[PetPlace] 전체 {total_count}건, {total_pages}페이지를 병렬로 수집합니다.")
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    pages = executor.map(lambda page_no: self.fetch_page(params, page_no), range(2, total_pages + 1))
+                    for page_data in pages:
+                        items.extend(self.parse_items(page_data))
+
+            if len(items) != total_count:
+                raise ValueError(f"수집 건수 불일치 (수집 {len(items)}건 / totalCount {total_count}건)")
 
             return items
         except Exception as e:
@@ -71,16 +111,21 @@ class PetPlaceETL(BaseETL):
         existing_keys = [k for k in mapping.keys() if k in df.columns]
         df = df[existing_keys].rename(columns=mapping)
 
+        # 문자열 컬럼을 Arrow 기반 StringDtype으로 변환하여 자르기 연산을 벡터화합니다.
+        # (행마다 Python str 객체를 만들지 않으며, 결측값은 'nan' 문자열이 아닌 NA로 유지됩니다.)
+        string_columns = [c for c in ['tel', 'category', 'facility_name'] if c in df.columns]
+        df = df.astype({c: 'string[pyarrow]' for c in string_columns})
+
         # [중요] 데이터 길이 제한 처리 (DB VARCHAR(50) 초과 에러 방지)
         # 50자 제한인 컬럼들은 안전하게 49자로 자릅니다.
         if 'tel' in df.columns:
-            df['tel'] = df['tel'].astype(str).str[:49].replace('nan', '')
+            df['tel'] = df['tel'].str.slice(0, 49).fillna('')
 
         if 'category' in df.columns:
-            df['category'] = df['category'].astype(str).str[:49].replace('nan', '')
+            df['category'] = df['category'].str.slice(0, 49).fillna('')
 
         if 'facility_name' in df.columns:
-            df['facility_name'] = df['facility_name'].astype(str).str[:254]
+            df['facility_name'] = df['facility_name'].str.slice(0, 254)
 
         # 데이터 타입 변환 (문자열 위경도를 숫자로)
         if 'latitude' in df.columns:
@@ -88,12 +133,15 @@ class PetPlaceETL(BaseETL):
         if 'longitude' in df.columns:
             df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
 
-        # 필수 정보(시설명, 주소)가 없는 행 제거
-        df = df.dropna(subset=['facility_name', 'address'])
-
-        # 위경도가 유효한 범위 내에 있는 데이터만 유지
-        df = df[(df['latitude'] > 30) & (df['latitude'] < 45)]
-        df = df[(df['longitude'] > 120) & (df['longitude'] < 135)]
+        # 필수 정보(시설명, 주소)가 있고 위경도가 유효한 범위 내에 있는 데이터만 유지
+        # 조건을 하나의 마스크로 결합하여 DataFrame 복사를 한 번만 수행합니다.
+        mask = (
+            df['facility_name'].notna()
+            & df['address'].notna()
+            & df['latitude'].between(30, 45, inclusive='neither')
+            & df['longitude'].between(120, 135, inclusive='neither')
+        )
+        df = df.loc[mask].copy()
 
         print(f"[PetPlace] 변환 완료: {len(df)}건의 유효 데이터를 확보했습니다.")
         return df
\ No newline at end of file
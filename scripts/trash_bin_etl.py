@@ -1,9 +1,12 @@
 import os
 import pandas as pd
-import requests
 import time
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sqlite3
+from contextlib import closing
+import numpy as np
+import asyncio
+import aiohttp
 from scripts.base_etl import BaseETL
 
 class TrashBinETL(BaseETL):
@@ -11,158 +14,328 @@ class TrashBinETL(BaseETL):
     NCP Geocoding API를 사용하여 가로휴지통 데이터를 수집하는 모듈입니다.
     좌표 확보 실패 시에도 데이터를 누락시키지 않고 전량 DB에 적재합니다.
     """
+    # 같은 위치에 종류·장소 유형별 수거함이 함께 설치되므로 엑셀의 모든 원천 컬럼을 키로 사용합니다.
+    # (좌표와 geom만 값 컬럼이므로 원천 행이 다르면 서로 다른 행으로 적재됩니다.)
+    natural_key = ('city_name', 'address', 'location_desc', 'bin_type', 'bin_place_type')
+
+    # 주소 정제 및 역명 추출에 사용하는 정규식 (클래스 로드 시 1회만 컴파일)
+    _PAREN = re.compile(r'\(.*?\)')
+    _SPECIAL_CHARS = re.compile(r'[^a-zA-Z0-9가-힣\s\-\,]')
+    _STATION = re.compile(r'([가-힣]+역)')
+
+    # 원천 엑셀 컬럼명 -> DB 컬럼명 매핑 (엑셀 로드 시 필요한 컬럼만 읽는 데에도 사용)
+    column_mapping = {
+        '자치구명': 'city_name',
+        '설치위치(도로명 주소)': 'address',
+        '세부 위치': 'location_desc',
+        '수거 쓰레기 종류': 'bin_type',
+        '설치 장소 유형': 'bin_place_type'
+    }
+
     def __init__(self):
         super().__init__(table_name='trash_bins')
         self.raw_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'raw')
         self.log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'logs')
+        self.cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'cache')
 
         # NCP 인증 정보 (Geocoding 전용)
         self.naver_client_id = (os.getenv('NAVER_CLIENT_ID') or "").strip().strip("'").strip('"')
         self.naver_client_secret = (os.getenv('NAVER_CLIENT_SECRET') or "").strip().strip("'").strip('"')
         self.geocoding_url = "https://maps.apigw.ntruss.com/map-geocode/v2/geocode"
 
-        self.session = requests.Session()
+        # 실행 간 재사용하는 디스크 지오코딩 캐시 (API 버전이 바뀌면 기존 결과를 사용하지 않습니다.)
+        self.geocache_file = os.path.join(self.cache_path, 'geocache.sqlite')
+        self.geocache_api_version = 'v2'
+        self.geocache_ttl = 30 * 24 * 60 * 60  # 30일(초)
+
+        self.headers = {}
         if self.naver_client_id and self.naver_client_secret:
-            self.session.headers.update({
+            self.headers.update({
                 "X-NCP-APIGW-API-KEY-ID": self.naver_client_id,
                 "X-NCP-APIGW-API-KEY": self.naver_client_secret,
                 "Accept": "application/json"
             })
 
+        # 단일 이벤트 루프에서 동시에 처리할 최대 요청 수 (커넥션 풀 크기와 동일)
+        self.concurrency = 100
+        # 일시적 오류 재시도 정책 (BaseETL.create_session의 Retry 설정과 동일)
+        self.max_retries = 3
+        self.retry_backoff = 0.3
+
+        # 정규화된 쿼리 문자열 -> (lat, lng) 캐시 및 진행 중인 요청 목록
+        self._geo_cache = {}
+        self._geo_pending = {}
+
         self.auth_failed = False
 
-    def clean_address(self, text):
-        """주소 오타 교정 및 정제 로직"""
-        if not text or pd.isna(text):
-            return ""
-        text = str(text).strip()
+    def clean_address(self, addresses):
+        """
+        주소 오타 교정 및 정제 로직.
+        행마다 Python 정규식을 호출하지 않도록 Series 전체에 벡터화된 .str 연산을 적용합니다.
+        """
+        s = addresses.fillna('').astype(str).str.strip()
 
         # 오타 자동 교정 (청게천 -> 청계천)
-        text = text.replace('청게천', '청계천')
-        text = text.replace('을지로지하', '을지로 지하')
+        s = s.str.replace('청게천', '청계천', regex=False)
+        s = s.str.replace('을지로지하', '을지로 지하', regex=False)
 
         # 괄호 및 불필요한 특수문자 제거
-        text = re.sub(r'\(.*?\)', '', text)
-        text = re.sub(r'[^a-zA-Z0-9가-힣\s\-\,]', '', text)
-        return ' '.join(text.split()).strip()
-
-    def call_naver_api(self, query):
-        """네이버 Geocoding API 호출 내부 메서드"""
-        if not query or len(query) < 2:
+        s = s.str.replace(self._PAREN, '', regex=True)
+        s = s.str.replace(self._SPECIAL_CHARS, '', regex=True)
+        return s.str.split().str.join(' ')
+
+    async def call_naver_api(self, session, semaphore, query):
+        """
+        네이버 Geocoding API 호출 내부 메서드.
+        같은 쿼리는 메모리 캐시 또는 이미 진행 중인 요청의 결과를 재사용합니다.
+        """
+        query = (query or "").strip()
+        if len(query) < 2:
             return None, None
 
+        if query in self._geo_cache:
+            return self._geo_cache[query]
+
+        # 동일 쿼리가 이미 요청 중이라면 새로 보내지 않고 그 결과를 함께 기다립니다.
+        pending = self._geo_pending.get(query)
+        if pending is None:
+            pending = asyncio.ensure_future(self.fetch_geocode(session, semaphore, query))
+            self._geo_pending[query] = pending
+        return await asyncio.shield(pending)
+
+    async def fetch_geocode(self, session, semaphore, query):
+        """
+        실제 NCP Geocoding 요청을 보내고, 확정된 응답(성공/결과 없음)을 캐시에 저장합니다.
+        일시적인 서버 오류(429/5xx)는 지수 백오프로 최대 max_retries회 재시도합니다.
+        """
         try:
-            response = self.session.get(self.geocoding_url, params={"query": query}, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('status') == 'OK' and data.get('addresses'):
-                    target = data['addresses'][0]
-                    return float(target['y']), float(target['x'])
-            elif response.status_code in [401, 403]:
-                self.auth_failed = True
+            for attempt in range(self.max_retries + 1):
+                async with semaphore:
+                    # 대기 중 다른 요청이 인증 실패를 확인했다면 요청을 보내지 않고 중단합니다.
+                    if self.auth_failed:
+                        return None, None
+                    async with session.get(self.geocoding_url, params={"query": query}) as response:
+                        status = response.status
+                        if status == 200:
+                            data = await response.json()
+                            result = (None, None)
+                            if data.get('status') == 'OK' and data.get('addresses'):
+                                target = data['addresses'][0]
+                                result = (float(target['y']), float(target['x']))
+                            # 결과가 없는 주소도 캐시하여 같은 실행 중 재요청하지 않습니다.
+                            self._geo_cache[query] = result
+                            return result
+                        elif status in [401, 403]:
+                            self.auth_failed = True
+                            return None, None
+
+                if status not in self.retry_status_codes or attempt == self.max_retries:
+                    break
+                # 세마포어를 반납한 상태로 대기하여 다른 요청의 진행을 막지 않습니다.
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
             return None, None
         except Exception:
             return None, None
+        finally:
+            self._geo_pending.pop(query, None)
 
-    def get_coordinates(self, city_name, address, location_desc):
-        """다단계 NCP Geocoding 전략"""
+    async def get_coordinates(self, session, semaphore, city_name, address, clean_addr, location_desc):
+        """다단계 NCP Geocoding 전략 (clean_addr는 clean_address로 미리 정제된 주소)"""
         if self.auth_failed or not self.naver_client_id:
             return None, None
 
-        clean_addr = self.clean_address(address)
-
         # 1. 서울특별시 + 자치구명 + 도로명 주소 결합 검색
         full_query = f"서울특별시 {city_name} {clean_addr}"
-        lat, lng = self.call_naver_api(full_query)
+        lat, lng = await self.call_naver_api(session, semaphore, full_query)
         if lat: return lat, lng
+        if self.auth_failed: return None, None
 
         # 2. '지하' 키워드 대응
         if '지하' in clean_addr:
             retry_query = f"서울특별시 {city_name} {clean_addr.replace('지하', '').strip()}"
-            lat, lng = self.call_naver_api(retry_query)
+            lat, lng = await self.call_naver_api(session, semaphore, retry_query)
             if lat: return lat, lng
+            if self.auth_failed: return None, None
 
         # 3. 상세 위치 기반 지하철역 Fallback (NCP Geocoding 시도)
         combined_text = f"{address} {location_desc}"
         if '역' in combined_text:
-            match = re.search(r'([가-힣]+역)', combined_text)
+            match = self._STATION.search(combined_text)
             if match:
                 station_query = f"서울특별시 {city_name} {match.group(1)}"
-                lat, lng = self.call_naver_api(station_query)
+                lat, lng = await self.call_naver_api(session, semaphore, station_query)
                 if lat: return lat, lng
 
         return None, None
 
+    async def geocode_all(self, cities, addresses, clean_addresses, descriptions, start_time):
+        """
+        단일 이벤트 루프에서 전체 주소를 동시에 지오코딩합니다.
+        세마포어로 동시 요청 수를 제한하며, 인증 실패 시 남은 요청을 모두 취소합니다.
+        좌표는 미리 할당한 float 배열(lats, lngs)에 바로 기록하며, 실패한 위치는 NaN으로 남습니다.
+        """
+        lats = np.full(len(addresses), np.nan, dtype=np.float64)
+        lngs = np.full(len(addresses), np.nan, dtype=np.float64)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=600)
+        timeout = aiohttp.ClientTimeout(total=5)
+
+        async with aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=timeout) as session:
+            async def geocode(index, city, addr, clean_addr, desc):
+                return index, await self.get_coordinates(session, semaphore, city, addr, clean_addr, desc)
+
+            tasks = [
+                asyncio.create_task(geocode(i, city, addr, clean_addr, desc))
+                for i, (city, addr, clean_addr, desc) in enumerate(zip(cities, addresses, clean_addresses, descriptions))
+            ]
+
+            completed = 0
+            for next_done in asyncio.as_completed(tasks):
+                index, (lat, lng) = await next_done
+                if lat is not None:
+                    lats[index], lngs[index] = lat, lng
+                completed += 1
+                if completed % 1000 == 0 or completed == len(addresses):
+                    print(f"[TrashBin] 진행률: {completed}/{len(addresses)} ({time.time()-start_time:.2f}초)")
+
+                # 완료된 결과를 반영한 뒤 인증 실패 여부를 확인하여, 대기 중인 코루틴을 남기지 않고 중단합니다.
+                if self.auth_failed:
+                    for task in [*tasks, *self._geo_pending.values()]:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    break
+
+        return lats, lngs
+
+    def load_geocache(self):
+        """
+        디스크 캐시에서 만료되지 않은 지오코딩 결과를 메모리 캐시로 불러옵니다.
+        불러온 쿼리 집합을 반환하며, 캐시를 열 수 없으면 빈 집합으로 진행합니다.
+        """
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            with closing(sqlite3.connect(self.geocache_file)) as conn:
+                with conn:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS geo (
+                            q TEXT NOT NULL,
+                            api_version TEXT NOT NULL,
+                            lat REAL,
+                            lng REAL,
+                            ts INTEGER,
+                            PRIMARY KEY (q, api_version)
+                        )
+                    """)
+                rows = conn.execute(
+                    "SELECT q, lat, lng FROM geo WHERE api_version = ? AND ts >= ?",
+                    (self.geocache_api_version, int(time.time()) - self.geocache_ttl)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"[TrashBin] 지오코딩 캐시 로드 실패: {e}")
+            return set()
+
+        for query, lat, lng in rows:
+            self._geo_cache[query] = (lat, lng)
+        print(f"[TrashBin] 지오코딩 캐시 {len(rows)}건을 불러왔습니다.")
+        return {query for query, _, _ in rows}
+
+    def save_geocache(self, loaded_queries):
+        """이번 실행에서 새로 확보한 좌표를 디스크 캐시에 저장하고 만료된 항목을 정리합니다."""
+        now = int(time.time())
+        rows = [
+            (query, self.geocache_api_version, lat, lng, now)
+            for query, (lat, lng) in self._geo_cache.items()
+            if lat is not None and query not in loaded_queries
+        ]
+
+        try:
+            with closing(sqlite3.connect(self.geocache_file)) as conn:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO geo (q, api_version, lat, lng, ts) VALUES (?, ?, ?, ?, ?)", rows)
+                    conn.execute("DELETE FROM geo WHERE ts < ?", (now - self.geocache_ttl,))
+        except sqlite3.Error as e:
+            print(f"[TrashBin] 지오코딩 캐시 저장 실패: {e}")
+
     def extract(self):
-        """최신 엑셀 파일 로드 (header=4 적용)"""
+        """
+        최신 엑셀 파일 로드 (header=4 적용).
+        엑셀 파싱 비용을 줄이기 위해 최초 로드 결과를 Parquet으로 캐시하고,
+        캐시가 원본보다 최신이면 엑셀 대신 캐시를 읽습니다.
+        """
         if not os.path.exists(self.raw_path):
             return None
 
-        files = [f for f in os.listdir(self.raw_path) if f.endswith('.xlsx')]
-        if not files:
+        # DirEntry는 stat 결과를 캐시하므로 파일마다 경로 조합/재조회를 반복하지 않습니다.
+        with os.scandir(self.raw_path) as it:
+            entries = [entry for entry in it if entry.is_file() and entry.name.endswith('.xlsx')]
+        if not entries:
             return None
 
-        latest_file = os.path.join(self.raw_path, max(files, key=lambda x: os.path.getctime(os.path.join(self.raw_path, x))))
+        latest_file = max(entries, key=lambda entry: entry.stat().st_ctime).path
+        cache_file = os.path.join(self.cache_path, os.path.splitext(os.path.basename(latest_file))[0] + '.parquet')
+
+        if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(latest_file):
+            try:
+                print(f"[TrashBin] Parquet 캐시에서 데이터 추출 중: {cache_file}")
+                return pd.read_parquet(cache_file)
+            except Exception as e:
+                print(f"[TrashBin] 캐시 로드 실패, 엑셀 파일을 다시 읽습니다: {e}")
+
         print(f"[TrashBin] 데이터 추출 중: {latest_file}")
 
         try:
-            return pd.read_excel(latest_file, header=4)
+            # 매핑 대상 컬럼만 파싱하여 불필요한 셀 처리 비용을 줄입니다.
+            df = pd.read_excel(
+                latest_file,
+                header=4,
+                engine='openpyxl',
+                usecols=lambda c: str(c).strip() in self.column_mapping
+            )
         except Exception as e:
             print(f"[TrashBin] 파일 로드 실패: {e}")
             return None
 
+        # 엑셀 컬럼은 문자/숫자가 섞여 있는 경우가 많아 Arrow 변환이 실패하므로 문자열로 통일합니다.
+        # (결측값은 NaN으로 유지되며, 캐시를 읽은 실행과 엑셀을 읽은 실행이 같은 데이터를 받습니다.)
+        df = df.astype(str)
+
+        # 캐시 저장 실패는 적재에 영향을 주지 않으므로 경고만 출력합니다.
+        try:
+            os.makedirs(self.cache_path, exist_ok=True)
+            df.to_parquet(cache_file, compression='zstd', index=False)
+        except Exception as e:
+            print(f"[TrashBin] Parquet 캐시 저장 실패: {e}")
+
+        return df
+
     def transform(self, df):
-        """데이터 정제 및 20개 워커 기반 병렬 지오코딩 수행"""
+        """데이터 정제 및 asyncio 기반 비동기 지오코딩 수행"""
         if df is None or df.empty:
             return pd.DataFrame()
 
         df.columns = df.columns.astype(str).str.strip()
-        mapping = {
-            '자치구명': 'city_name',
-            '설치위치(도로명 주소)': 'address',
-            '세부 위치': 'location_desc',
-            '수거 쓰레기 종류': 'bin_type',
-            '설치 장소 유형': 'bin_place_type'
-        }
-
-        df = df[[c for c in mapping.keys() if c in df.columns]].rename(columns=mapping)
+        df = df[[c for c in self.column_mapping.keys() if c in df.columns]].rename(columns=self.column_mapping)
         df['city_name'] = df['city_name'].astype(str).str.strip()
         df['address'] = df['address'].astype(str).str.strip()
         df['location_desc'] = df['location_desc'].astype(str).str.strip()
 
         df = df[~df['address'].isin(['nan', '', 'None'])].dropna(subset=['address'])
 
-        workers = 20
-        print(f"[TrashBin] 지오코딩 시작 (Target: {len(df)}건, Workers: {workers})...")
+        print(f"[TrashBin] 지오코딩 시작 (Target: {len(df)}건, 동시 요청: {self.concurrency})...")
         start_time = time.time()
 
-        cities = df['city_name'].tolist()
-        addresses = df['address'].tolist()
-        descriptions = df['location_desc'].tolist()
-        results = [None] * len(addresses)
-
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            future_to_index = {
-                executor.submit(self.get_coordinates, city, addr, desc): i
-                for i, (city, addr, desc) in enumerate(zip(cities, addresses, descriptions))
-            }
-
-            completed = 0
-            for future in as_completed(future_to_index):
-                if self.auth_failed:
-                    executor.shutdown(wait=False, cancel_futures=True)
-                    break
-                index = future_to_index[future]
-                results[index] = future.result()
-                completed += 1
-                if completed % 1000 == 0 or completed == len(df):
-                    print(f"[TrashBin] 진행률: {completed}/{len(df)} ({time.time()-start_time:.2f}초)")
-
-        df['latitude'] = [r[0] if r else None for r in results[:len(df)]]
-        df['longitude'] = [r[1] if r else None for r in results[:len(df)]]
-
-        df['latitude'] = pd.to_numeric(df['latitude'], errors='coerce')
-        df['longitude'] = pd.to_numeric(df['longitude'], errors='coerce')
+        loaded_queries = self.load_geocache()
+        lats, lngs = asyncio.run(self.geocode_all(
+            df['city_name'].tolist(),
+            df['address'].tolist(),
+            self.clean_address(df['address']).tolist(),
+            df['location_desc'].tolist(),
+            start_time
+        ))
+        self.save_geocache(loaded_queries)
+
+        df['latitude'] = lats
+        df['longitude'] = lngs
 
         success_count = df['latitude'].notna().sum()
         fail_count = len(df) - success_count
@@ -1,22 +1,39 @@
 
 import os
-import requests
+import math
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from scripts.base_etl import BaseETL
 
 class WaterFountainETL(BaseETL):
     """
     서울 열린데이터 광장의 '서울시 상수도본부 아리스 음수대 정보(TbViewGisArisu)' API를 이용한 수집 모듈입니다.
     """
+    # 같은 공원(주소)에 여러 음수대가 있으므로 좌표까지 포함하여 식별합니다.
+    # 좌표가 없는 음수대도 적재되며, 이때 키의 NULL은 같은 값으로 취급됩니다. (BaseETL.ensure_natural_key_index)
+    natural_key = ('fountain_name', 'address', 'latitude', 'longitude')
+
     def __init__(self):
         super().__init__(table_name='drinking_fountains')
         self.api_key = os.getenv('SEOUL_API_KEY')
-        # TbViewGisArisu API 엔드포인트
-        self.endpoint = f"http://openapi.seoul.go.kr:8088/{self.api_key}/json/TbViewGisArisu/1/1000/"
+        # TbViewGisArisu API 엔드포인트 (요청 시 /{시작}/{끝}/ 범위를 덧붙입니다.)
+        self.endpoint = f"http://openapi.seoul.go.kr:8088/{self.api_key}/json/TbViewGisArisu"
+        self.session = self.create_session()
+        # 서울 열린데이터 광장의 1회 최대 조회 건수 및 병렬 조회 워커 수
+        self.page_size = 1000
+        self.max_workers = 8
+
+    def fetch_page(self, start):
+        """start번째 행부터 page_size건을 조회하여 응답 JSON을 반환합니다."""
+        response = self.session.get(f"{self.endpoint}/{start}/{start + self.page_size - 1}/", timeout=20)
+        response.raise_for_status()
+        return response.json()
 
     def extract(self):
         """
         서울시 아리스 음수대 API로부터 데이터를 추출합니다.
+        첫 페이지의 list_total_count로 전체 건수를 구한 뒤 나머지 구간을 병렬로 조회하며,
+        수집 건수가 list_total_count와 다르면 전체를 실패로 처리합니다.
         """
         if not self.api_key:
             print("[WaterFountain] 오류: SEOUL_API_KEY가 .env에 설정되지 않았습니다.")
@@ -26,19 +43,32 @@ class WaterFountainETL(BaseETL):
             masked_url = self.endpoint.replace(self.api_key, '********')
             print(f"[WaterFountain] 서울시 API 접속 시도: {masked_url}")
 
-            response = requests.get(self.endpoint, timeout=20)
-            response.raise_for_status()
+            data = self.fetch_page(1)
 
-            data = response.json()
-
-            if 'TbViewGisArisu' in data:
-                items = data.get('TbViewGisArisu', {}).get('row', [])
-                return items
-            else:
+            if 'TbViewGisArisu' not in data:
                 err_msg = data.get('RESULT', {}).get('MESSAGE', '알 수 없는 응답 구조입니다.')
                 print(f"[WaterFountain] API 호출 실패: {err_msg}")
                 return []
 
+            items = data['TbViewGisArisu'].get('row', [])
+            total_count = int(data['TbViewGisArisu'].get('list_total_count') or 0)
+            total_pages = math.ceil(total_count / self.page_size)
+
+            if total_pages > 1:
+                print(f"[WaterFountain] 전체 {total_count}건, {total_pages}구간을 병렬로 수집합니다.")
+                starts = range(1 + self.page_size, total_count + 1, self.page_size)
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    for page_data in executor.map(self.fetch_page, starts):
+                        if 'TbViewGisArisu' not in page_data:
+                            err_msg = page_data.get('RESULT', {}).get('MESSAGE', '알 수 없는 응답 구조입니다.')
+                            raise ValueError(f"구간 조회 실패: {err_msg}")
+                        items.extend(page_data['TbViewGisArisu'].get('row', []))
+
+            if len(items) != total_count:
+                raise ValueError(f"수집 건수 불일치 (수집 {len(items)}건 / list_total_count {total_count}건)")
+
+            return items
+
         except Exception as e:
             print(f"[WaterFountain] API 추출 오류 발생: {e}")
             return []
@@ -76,6 +106,6 @@ class WaterFountainETL(BaseETL):
 
     def load(self, df):
         """
-        BaseETL의 load 메서드를 호출하여 TRUNCATE 후 적재를 수행합니다.
+        BaseETL의 load 메서드를 호출하여 자연키 기반 UPSERT 적재를 수행합니다.
         """
         super().load(df)
\ No newline at end of file
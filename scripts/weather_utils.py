@@ -1,4 +1,32 @@
 import math
+import numpy as np
+
+# [CS: 상수 관리] 프로그램 전반에서 변하지 않는 물리적 상수를 대문자로 선언하여 가독성과 유지보수성을 높입니다.
+RE = 6371.00877  # 지구 반경(km)
+GRID = 5.0       # 격자 간격(km)
+SLAT1 = 30.0     # 투영 위도 1
+SLAT2 = 60.0     # 투영 위도 2
+OLON = 126.0     # 기준점 경도
+OLAT = 38.0      # 기준점 위도
+XO = 43          # 기준점 X좌표
+YO = 136         # 기준점 Y좌표
+
+DEGRAD = math.pi / 180.0
+
+# [CS: 최적화 - 상수 접기 (Constant Folding)]
+# 투영 파라미터(sn, sf, ro)는 위 상수만으로 결정되므로 모듈 로드 시 한 번만 계산해 둡니다.
+_RE_OVER_GRID = RE / GRID
+_SLAT1_RAD = SLAT1 * DEGRAD
+_SLAT2_RAD = SLAT2 * DEGRAD
+_OLON_RAD = OLON * DEGRAD
+_OLAT_RAD = OLAT * DEGRAD
+
+_SN = math.tan(math.pi * 0.25 + _SLAT2_RAD * 0.5) / math.tan(math.pi * 0.25 + _SLAT1_RAD * 0.5)
+_SN = math.log(math.cos(_SLAT1_RAD) / math.cos(_SLAT2_RAD)) / math.log(_SN)
+_SF = math.tan(math.pi * 0.25 + _SLAT1_RAD * 0.5)
+_SF = math.pow(_SF, _SN) * math.cos(_SLAT1_RAD) / _SN
+_RO = math.tan(math.pi * 0.25 + _OLAT_RAD * 0.5)
+_RO = _RE_OVER_GRID * _SF / math.pow(_RO, _SN)
 
 def convert_to_grid(lat_degree, lon_degree):
     """
@@ -8,45 +36,53 @@ def convert_to_grid(lat_degree, lon_degree):
     지구 구면을 평면상의 격자로 투영하는 복잡한 수학적 변환입니다.
     부동소수점 연산의 정밀도가 결과값에 직접적인 영향을 줍니다.
     """
-
-    # [CS: 상수 관리] 프로그램 전반에서 변하지 않는 물리적 상수를 대문자로 선언하여 가독성과 유지보수성을 높입니다.
-    RE = 6371.00877  # 지구 반경(km)
-    GRID = 5.0       # 격자 간격(km)
-    SLAT1 = 30.0     # 투영 위도 1
-    SLAT2 = 60.0     # 투영 위도 2
-    OLON = 126.0     # 기준점 경도
-    OLAT = 38.0      # 기준점 위도
-    XO = 43          # 기준점 X좌표
-    YO = 136         # 기준점 Y좌표
-
-    DEGRAD = math.pi / 180.0
-
-    re = RE / GRID
-    slat1 = SLAT1 * DEGRAD
-    slat2 = SLAT2 * DEGRAD
-    olon = OLON * DEGRAD
-    olat = OLAT * DEGRAD
-
-    sn = math.tan(math.pi * 0.25 + slat2 * 0.5) / math.tan(math.pi * 0.25 + slat1 * 0.5)
-    sn = math.log(math.cos(slat1) / math.cos(slat2)) / math.log(sn)
-    sf = math.tan(math.pi * 0.25 + slat1 * 0.5)
-    sf = math.pow(sf, sn) * math.cos(slat1) / sn
-    ro = math.tan(math.pi * 0.25 + olat * 0.5)
-    ro = re * sf / math.pow(ro, sn)
-
     ra = math.tan(math.pi * 0.25 + (lat_degree) * DEGRAD * 0.5)
-    ra = re * sf / math.pow(ra, sn)
-    theta = lon_degree * DEGRAD - olon
+    ra = _RE_OVER_GRID * _SF / math.pow(ra, _SN)
+    theta = lon_degree * DEGRAD - _OLON_RAD
 
     if theta > math.pi:
         theta -= 2.0 * math.pi
     if theta < -math.pi:
         theta += 2.0 * math.pi
-    theta *= sn
+    theta *= _SN
 
     # [CS: 자료구조 - 결과값 반환]
     # 변환된 좌표를 정수형(int)으로 변환한 뒤, (x, y) 형태의 튜플(Tuple) 구조로 반환합니다.
     nx = math.floor(ra * math.sin(theta) + XO + 0.5)
-    ny = math.floor(ro - ra * math.cos(theta) + YO + 0.5)
+    ny = math.floor(_RO - ra * math.cos(theta) + YO + 0.5)
+
+    return nx, ny
+
+
+def convert_to_grid_batch(lats, lons):
+    """
+    위경도 배열을 기상청 격자 좌표(nx, ny) 배열로 한 번에 변환합니다.
+
+    [CS: 최적화 - 벡터화 (Vectorization)]
+    convert_to_grid와 동일한 람베르트 정각원추도법 연산을 NumPy 배열 단위로 수행하여
+    시설 전체 좌표를 격자로 변환할 때 점마다 발생하는 Python 호출 비용을 제거합니다.
+
+    [결측 좌표 처리]
+    지오코딩 실패 등으로 위도/경도가 NaN·inf인 점은 변환하지 않고 마스킹합니다.
+    반환값은 np.ma.MaskedArray(int32)이며, 해당 위치의 mask가 True입니다.
+    (스칼라 함수 convert_to_grid는 NaN 입력 시 예외를 발생시킵니다.)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    # 결측 좌표는 기준점으로 대체해 계산한 뒤 마스킹하여 정수 변환 경고와 쓰레기 값을 막습니다.
+    invalid = ~(np.isfinite(lats) & np.isfinite(lons))
+    lats = np.where(invalid, OLAT, lats)
+    lons = np.where(invalid, OLON, lons)
+
+    ra = _RE_OVER_GRID * _SF / np.power(np.tan(np.pi * 0.25 + lats * DEGRAD * 0.5), _SN)
+    theta = lons * DEGRAD - _OLON_RAD
+
+    theta = np.where(theta > np.pi, theta - 2.0 * np.pi, theta)
+    theta = np.where(theta < -np.pi, theta + 2.0 * np.pi, theta)
+    theta *= _SN
+
+    nx = np.floor(ra * np.sin(theta) + XO + 0.5).astype(np.int32)
+    ny = np.floor(_RO - ra * np.cos(theta) + YO + 0.5).astype(np.int32)
 
-    return nx, ny
\ No newline at end of file
+    return np.ma.masked_array(nx, mask=invalid), np.ma.masked_array(ny, mask=invalid)